@@ -1,3 +1,21 @@
-from .main import CodeExecutionClient, ExecutionResult
+from .main import (
+    CodeExecutionClient,
+    AsyncCodeExecutionClient,
+    ExecutionResult,
+    Runtime,
+    Package,
+    PackageAlreadyInstalledError,
+    PackageNotFoundError,
+    CodeExecutionError,
+)
 
-__all__ = ['CodeExecutionClient', 'ExecutionResult']
\ No newline at end of file
+__all__ = [
+    'CodeExecutionClient',
+    'AsyncCodeExecutionClient',
+    'ExecutionResult',
+    'Runtime',
+    'Package',
+    'PackageAlreadyInstalledError',
+    'PackageNotFoundError',
+    'CodeExecutionError',
+]
\ No newline at end of file
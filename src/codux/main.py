@@ -1,8 +1,46 @@
+import asyncio
+import functools
+import gzip
+import sys
+import threading
 import requests
-import websockets
+from websockets.asyncio.client import ClientConnection, connect as ws_connect
+from websockets.protocol import State
 import json
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any, Union
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+import urllib3
+from urllib3.util.retry import Retry
+from dataclasses import dataclass, fields
+from urllib.parse import urlsplit
+from typing import List, Optional, Dict, Any, Iterator, Tuple, Union
+
+try:
+    import httpx
+except ImportError:  # Optional dependency, installed with the "async" extra
+    httpx = None
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, installed with the "speedups" extra
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # Optional dependency, installed with the "speedups" extra
+    ijson = None
+
+__all__ = [
+    'CodeExecutionClient',
+    'AsyncCodeExecutionClient',
+    'ExecutionResult',
+    'Runtime',
+    'Package',
+    'PackageAlreadyInstalledError',
+    'PackageNotFoundError',
+    'CodeExecutionError',
+]
 
 class PackageAlreadyInstalledError(Exception):
     """Raised when attempting to install an already installed package"""
@@ -14,22 +52,31 @@ class PackageNotFoundError(Exception):
 
 class CodeExecutionError(Exception):
     """Generic error for code execution issues"""
-    pass
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
 
-@dataclass
+# __slots__-backed dataclasses need Python 3.10+; older versions fall back to __dict__
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_SLOTS)
 class Runtime:
     language: str
     version: str
     runtime: Optional[str] = None
-    aliases: List[str] = field(default_factory=list)
+    aliases: Tuple[str, ...] = ()
+
+    def __post_init__(self) -> None:
+        # The API sends aliases as a JSON list; a tuple keeps Runtime hashable
+        object.__setattr__(self, 'aliases', tuple(self.aliases))
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
 class Package:
     language: str
     language_version: str
     installed: bool
 
-@dataclass
+@dataclass(**_SLOTS)
 class ExecutionResult:
     install_output: Optional[str] = None
     install_error: Optional[str] = None
@@ -37,12 +84,167 @@ class ExecutionResult:
     execute_error: Optional[str] = None
     web_app_url: Optional[str] = None
 
+# Keepalive pings, bounded frame size and receive queue, and no
+# permessage-deflate: its per-frame CPU cost buys little for code payloads,
+# at the price of more bandwidth for text-heavy output
+_WS_OPTIONS: Dict[str, Any] = {
+    "ping_interval": 20,
+    "ping_timeout": 20,
+    "max_size": 2 ** 22,
+    "max_queue": 32,
+    "compression": None,
+}
+
+# Optional /execute fields, only sent when explicitly set
+_OPTIONAL_EXECUTE_FIELDS = frozenset((
+    "dependencies",
+    "args",
+    "stdin",
+    "compile_memory_limit",
+    "run_memory_limit",
+    "run_timeout",
+    "compile_timeout",
+    "run_cpu_time",
+    "compile_cpu_time",
+))
+
+@functools.lru_cache(maxsize=None)
+def _field_names(cls: type) -> frozenset:
+    return frozenset(f.name for f in fields(cls))
+
+def _from_dict(cls: type, data: Dict[str, Any]) -> Any:
+    """Build a dataclass instance from an API object, ignoring unknown fields"""
+    names = _field_names(cls)
+    return cls(**{k: v for k, v in data.items() if k in names})
+
+def _index_packages(packages: List[Package]) -> Dict[Tuple[str, str], Package]:
+    """Key packages by (language, language_version) for constant-time lookup"""
+    return {(p.language, p.language_version): p for p in packages}
+
+def _build_execute_payload(
+    code: str,
+    language: str,
+    version: str,
+    name: str = "main",
+    encoding: str = "utf8",
+    **options: Any
+) -> Dict[str, Any]:
+    """Build the JSON body for the /execute endpoint, omitting unset options"""
+    unknown = options.keys() - _OPTIONAL_EXECUTE_FIELDS
+    if unknown:
+        raise TypeError(f"Unexpected execution option(s): {', '.join(sorted(unknown))}")
+
+    payload = {
+        "language": language,
+        "version": version,
+        "files": [{
+            "name": name,
+            "content": code,
+            "encoding": encoding
+        }]
+    }
+    payload.update({key: value for key, value in options.items() if value is not None})
+    return payload
+
+def _parse_execute_response(response: Dict[str, Any]) -> ExecutionResult:
+    """Convert an /execute response body into an ExecutionResult"""
+    stages = response.get("stages") or {}
+    install = stages.get("install") or {}
+    execute = stages.get("execute") or {}
+    return ExecutionResult(
+        install_output=install.get("stdout"),
+        install_error=install.get("stderr"),
+        execute_output=execute.get("stdout"),
+        execute_error=execute.get("stderr"),
+        web_app_url=response.get("webAppUrl")
+    )
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize obj to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+def _loads(data: bytes) -> Any:
+    """Deserialize JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# Request bodies at least this large are gzipped when compress_requests is set
+_COMPRESS_MIN_SIZE = 1024
+
+def _json_body(obj: Any, compress: bool) -> Tuple[bytes, Dict[str, str]]:
+    """Serialize a JSON request body, gzipping it if asked and large enough"""
+    body = _dumps(obj)
+    headers = {"Content-Type": "application/json"}
+    if compress and len(body) >= _COMPRESS_MIN_SIZE:
+        body = gzip.compress(body, compresslevel=1)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+def _with_gzip(headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Request a gzip-encoded response unless the caller chose an encoding"""
+    return {"Accept-Encoding": "gzip", **(headers or {})}
+
+def _loads_body(body: bytes) -> Any:
+    """Decode a successful response body, mapping invalid JSON to CodeExecutionError"""
+    if not body:
+        return {}
+    try:
+        return _loads(body)
+    except ValueError as e:  # json and orjson decode errors both subclass ValueError
+        raise CodeExecutionError(f"API request failed: invalid JSON response: {str(e)}")
+
+def _error_message(response: Any, default: str) -> str:
+    """Extract the API error message from a response, falling back to default"""
+    try:
+        return _loads(response.content).get('message', default)
+    except ValueError:
+        return default
+
+# HTTPAdapters shared across CodeExecutionClient instances, keyed by
+# (scheme://host:port, pool_size, max_retries)
+_ADAPTERS: Dict[Tuple[str, int, int], HTTPAdapter] = {}
+_ADAPTERS_LOCK = threading.Lock()
+
+def _shared_adapter(base_url: str, pool_size: int, max_retries: int) -> HTTPAdapter:
+    """Return the pooled HTTPAdapter for base_url's host, creating it on first use"""
+    parts = urlsplit(base_url)
+    key = (f"{parts.scheme}://{parts.netloc}", pool_size, max_retries)
+    with _ADAPTERS_LOCK:
+        adapter = _ADAPTERS.get(key)
+        if adapter is None:
+            adapter = HTTPAdapter(
+                pool_connections=pool_size,
+                pool_maxsize=pool_size,
+                # Only idempotent requests are retried on a bad status: a POST
+                # /execute that got a 502/503/504 may already have run the code.
+                # Once retries run out, the last response is returned so _send
+                # can map it to an error with the API's message and status.
+                max_retries=Retry(
+                    total=max_retries,
+                    backoff_factor=0.1,
+                    status_forcelist=[502, 503, 504],
+                    allowed_methods=frozenset(["GET", "DELETE"]),
+                    raise_on_status=False
+                )
+            )
+            _ADAPTERS[key] = adapter
+        return adapter
+
 class CodeExecutionClient:
     def __init__(
         self, 
         base_url: str = "http://localhost/api/v2", 
         timeout: int = 30,
-        headers: Optional[Dict[str, str]] = None
+        headers: Optional[Dict[str, str]] = None,
+        pool_size: int = 32,
+        max_retries: int = 3,
+        cache_ttl: float = 60.0,
+        stream_threshold: Optional[int] = 1024 * 1024,
+        session: Optional[requests.Session] = None,
+        compress_requests: bool = False
     ):
         """
         Initialize the CodeExecutionClient
@@ -51,22 +253,96 @@ class CodeExecutionClient:
             base_url: Base URL for the API
             timeout: Request timeout in seconds
             headers: Optional dictionary of default headers to include in all requests
+            pool_size: Number of keep-alive connections kept per host
+            max_retries: Number of retries on connection errors, and on 502/503/504
+                responses to GET and DELETE requests
+            cache_ttl: Seconds to cache list_runtimes/list_packages results (0 disables caching)
+            stream_threshold: Response size in bytes from which listings are parsed
+                incrementally with ijson, if installed (None disables streaming)
+            session: Optional pre-configured requests.Session to send requests with,
+                instead of one using the shared connection pools (pool_size and
+                max_retries are then ignored)
+            compress_requests: Gzip JSON request bodies of 1 KiB or more and send them
+                with Content-Encoding: gzip (the server must accept compressed bodies)
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
-        self.session = requests.Session()
+        self.pool_size = pool_size
+        self.compress_requests = compress_requests
+        # Precompute URL prefixes so requests don't re-split the base URL
+        self._base = self.base_url + '/'
+        scheme, _, rest = self.base_url.partition('://')
+        self._ws_url = f"{'wss' if scheme == 'https' else 'ws'}://{rest}/connect"
+        self.cache_ttl = cache_ttl
+        self.stream_threshold = stream_threshold
+        self._runtimes_cache: Optional[Tuple[float, List[Runtime]]] = None
+        # The package cache also holds a (language, version) index of the listing
+        self._packages_cache: Optional[
+            Tuple[float, List[Package], Dict[Tuple[str, str], Package]]
+        ] = None
+        # Whether the server exposes /execute/batch; probed on first use
+        self._supports_batch: Optional[bool] = None
+        # Shared WebSocket for get_or_open_websocket; the lock is created
+        # lazily so it binds to the event loop that first uses it
+        self._ws: Optional[ClientConnection] = None
+        self._ws_lock: Optional[asyncio.Lock] = None
+        
+        self._owns_session = session is None
+        if session is not None:
+            # A caller-supplied session keeps its own adapters and pooling
+            self.session = session
+        else:
+            self.session = requests.Session()
+            # Reuse warm keep-alive connections instead of reconnecting per request.
+            # The adapter (and its connection pool) is shared by all clients
+            # talking to the same host with the same pool settings.
+            adapter = _shared_adapter(self.base_url, pool_size, max_retries)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+            self.session.headers["Connection"] = "keep-alive"
+            # Small listing/DELETE responses aren't worth compressing; /execute opts back in
+            self.session.headers["Accept-Encoding"] = "identity"
         if headers:
             self.session.headers.update(headers)
 
-    def _make_request(
+    def __enter__(self) -> "CodeExecutionClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the HTTP session if the client created it
+        
+        The connection pool shared with other clients for the same host is
+        unmounted rather than closed, so their warm connections survive; use
+        close_shared_pools to tear it down. A session passed to the
+        constructor is left open for its owner to close.
+        """
+        if self._owns_session:
+            # Every adapter on an owned session is a shared one
+            self.session.adapters.clear()
+            self.session.close()
+
+    @classmethod
+    def close_shared_pools(cls) -> None:
+        """Close the connection pools shared between client instances"""
+        with _ADAPTERS_LOCK:
+            adapters = list(_ADAPTERS.values())
+            _ADAPTERS.clear()
+        for adapter in adapters:
+            adapter.close()
+
+    def _send(
         self, 
         method: str, 
         endpoint: str, 
         headers: Optional[Dict[str, str]] = None,
         **kwargs
-    ) -> Dict[str, Any]:
+    ) -> requests.Response:
         """
-        Make an HTTP request to the API
+        Send an HTTP request to the API and check the response status
         
         Args:
             method: HTTP method
@@ -75,14 +351,20 @@ class CodeExecutionClient:
             **kwargs: Additional arguments passed to requests.request()
             
         Returns:
-            Dict containing the JSON response
+            The successful requests.Response
             
         Raises:
             PackageNotFoundError: When a package is not found
             PackageAlreadyInstalledError: When attempting to install an existing package
             CodeExecutionError: For other API errors
         """
-        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        path = endpoint.lstrip('/')
+        url = self._base + path
+        
+        # Serialize JSON bodies ourselves so orjson can be used when available
+        if 'json' in kwargs:
+            kwargs['data'], body_headers = _json_body(kwargs.pop('json'), self.compress_requests)
+            headers = {**body_headers, **(headers or {})}
         
         # Merge request-specific headers with session headers
         if headers:
@@ -94,47 +376,176 @@ class CodeExecutionClient:
             response = self.session.request(method=method, url=url, timeout=self.timeout, **kwargs)
             
             if response.status_code == 404:
-                raise PackageNotFoundError(response.json().get('message', 'Package not found'))
-            elif response.status_code == 409 and endpoint == 'packages':
-                raise PackageAlreadyInstalledError(response.json().get('message', 'Package already installed'))
+                raise PackageNotFoundError(_error_message(response, 'Package not found'))
+            elif response.status_code == 409 and path == 'packages':
+                raise PackageAlreadyInstalledError(_error_message(response, 'Package already installed'))
             
             response.raise_for_status()
-            return response.json() if response.content else {}
+            return response
             
         except requests.exceptions.RequestException as e:
             if isinstance(e, requests.exceptions.HTTPError):
-                try:
-                    error_msg = e.response.json().get('message', str(e))
-                except json.JSONDecodeError:
-                    error_msg = str(e)
-                raise CodeExecutionError(f"API request failed: {error_msg}")
+                error_msg = _error_message(e.response, str(e))
+                raise CodeExecutionError(f"API request failed: {error_msg}", e.response.status_code)
             raise CodeExecutionError(f"API request failed: {str(e)}")
 
+    def _make_request(
+        self, 
+        method: str, 
+        endpoint: str, 
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Make an HTTP request to the API
+        
+        Args:
+            method: HTTP method
+            endpoint: API endpoint
+            headers: Optional additional headers for this specific request
+            **kwargs: Additional arguments passed to requests.request()
+            
+        Returns:
+            Dict containing the JSON response
+        """
+        response = self._send(method, endpoint, headers=headers, **kwargs)
+        if not kwargs.get('stream'):
+            return _loads_body(response.content)
+
+        # Decode straight from the socket buffer, skipping the copy into
+        # response.content and requests' text encoding detection
+        with response:
+            try:
+                body = response.raw.read(decode_content=True)
+            except urllib3.exceptions.HTTPError as e:
+                raise CodeExecutionError(f"API request failed: {str(e)}")
+        return _loads_body(body)
+
+    def _stream_list(
+        self,
+        endpoint: str,
+        cls: type,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Iterator[Any]:
+        """
+        Yield dataclass instances from a JSON array endpoint
+        
+        Bodies at least stream_threshold bytes long (or of unknown length) are
+        parsed incrementally with ijson while they are still arriving; smaller
+        ones are decoded in one go.
+        """
+        response = self._send("GET", endpoint, headers=headers, stream=True)
+        with response:
+            try:
+                length = response.headers.get("Content-Length")
+                if length is not None and int(length) < self.stream_threshold:
+                    items = _loads_body(response.content) or []
+                else:
+                    response.raw.decode_content = True
+                    items = ijson.items(response.raw, "item", use_float=True)
+                for item in items:
+                    yield _from_dict(cls, item)
+            except (
+                requests.exceptions.RequestException,
+                urllib3.exceptions.HTTPError,
+                ijson.JSONError
+            ) as e:
+                # The body is read after _send returns, so map read and parse
+                # failures here the same way _make_request does
+                raise CodeExecutionError(f"API request failed: {str(e)}")
+
+    def _fetch_list(
+        self,
+        endpoint: str,
+        cls: type,
+        headers: Optional[Dict[str, str]] = None
+    ) -> List[Any]:
+        """Fetch a JSON array endpoint as a list of dataclass instances"""
+        if ijson is not None and self.stream_threshold is not None:
+            return list(self._stream_list(endpoint, cls, headers=headers))
+        response = self._make_request("GET", endpoint, headers=headers)
+        return [_from_dict(cls, item) for item in response]
+
+    def _is_fresh(self, cache: Tuple[Any, ...]) -> bool:
+        """Check whether a cached (timestamp, value, ...) entry is still within the TTL"""
+        return time.monotonic() - cache[0] < self.cache_ttl
+
+    def invalidate_caches(self) -> None:
+        """Drop cached runtime and package listings"""
+        self._runtimes_cache = None
+        self._packages_cache = None
+
     def list_runtimes(self, headers: Optional[Dict[str, str]] = None) -> List[Runtime]:
         """
         List available runtimes
         
+        Results are cached for cache_ttl seconds. Requests with custom
+        headers always bypass the cache.
+        
         Args:
             headers: Optional headers for this request
             
         Returns:
             List of Runtime objects
         """
-        response = self._make_request("GET", "/runtimes", headers=headers)
-        return [Runtime(**runtime) for runtime in response]
+        cache = self._runtimes_cache
+        if headers is None and cache is not None and self._is_fresh(cache):
+            return list(cache[1])
+        runtimes = self._fetch_list("/runtimes", Runtime, headers=headers)
+        if headers is None:
+            self._runtimes_cache = (time.monotonic(), runtimes)
+        return list(runtimes)
 
     def list_packages(self, headers: Optional[Dict[str, str]] = None) -> List[Package]:
         """
         List installed packages
         
+        Results are cached for cache_ttl seconds and invalidated by
+        install_package/uninstall_package. Requests with custom headers
+        always bypass the cache.
+        
         Args:
             headers: Optional headers for this request
             
         Returns:
             List of Package objects
         """
-        response = self._make_request("GET", "/packages", headers=headers)
-        return [Package(**package) for package in response]
+        cache = self._packages_cache
+        if headers is None and cache is not None and self._is_fresh(cache):
+            return list(cache[1])
+        packages = self._fetch_list("/packages", Package, headers=headers)
+        if headers is None:
+            self._packages_cache = (time.monotonic(), packages, _index_packages(packages))
+        return list(packages)
+
+    def get_package(
+        self,
+        language: str,
+        version: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Optional[Package]:
+        """
+        Look up a package by language and version
+        
+        Uses an index of the cached package listing, so repeated lookups
+        don't rescan the list.
+        
+        Args:
+            language: Programming language
+            version: Language version
+            headers: Optional headers for this request (bypasses the cache)
+            
+        Returns:
+            The matching Package, or None if the server doesn't list it
+        """
+        cache = self._packages_cache
+        if headers is None and cache is not None and self._is_fresh(cache):
+            return cache[2].get((language, version))
+        packages = self._fetch_list("/packages", Package, headers=headers)
+        index = _index_packages(packages)
+        if headers is None:
+            self._packages_cache = (time.monotonic(), packages, index)
+        return index.get((language, version))
 
     def install_package(
         self, 
@@ -159,6 +570,34 @@ class CodeExecutionClient:
             return True
         except PackageAlreadyInstalledError:
             return False
+        finally:
+            self.invalidate_caches()
+
+    def install_packages(
+        self,
+        specs: List[Tuple[str, str]],
+        headers: Optional[Dict[str, str]] = None
+    ) -> Dict[Tuple[str, str], bool]:
+        """
+        Install several packages concurrently
+        
+        Args:
+            specs: List of (language, version) pairs
+            headers: Optional headers for these requests
+            
+        Returns:
+            Dict mapping each (language, version) pair to True if it was
+            installed, False if it was already installed
+        """
+        if not specs:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, len(specs))) as executor:
+            futures = {
+                executor.submit(self.install_package, language, version, headers): (language, version)
+                for language, version in specs
+            }
+            return {futures[future]: future.result() for future in as_completed(futures)}
 
     def uninstall_package(
         self, 
@@ -175,7 +614,10 @@ class CodeExecutionClient:
             headers: Optional headers for this request
         """
         payload = {"language": language, "version": version}
-        self._make_request("DELETE", "/packages", json=payload, headers=headers)
+        try:
+            self._make_request("DELETE", "/packages", json=payload, headers=headers)
+        finally:
+            self.invalidate_caches()
 
     def terminate_process(
         self, 
@@ -194,7 +636,7 @@ class CodeExecutionClient:
     async def connect_websocket(
         self,
         headers: Optional[Dict[str, str]] = None
-    ) -> websockets.WebSocketClientProtocol:
+    ) -> ClientConnection:
         """
         Connect to the WebSocket endpoint
         
@@ -204,8 +646,36 @@ class CodeExecutionClient:
         Returns:
             WebSocket connection object
         """
-        ws_url = f"ws://{self.base_url.split('://', 1)[1]}/connect"
-        return await websockets.connect(ws_url, extra_headers=headers)
+        return await ws_connect(self._ws_url, additional_headers=headers, **_WS_OPTIONS)
+
+    async def get_or_open_websocket(
+        self,
+        headers: Optional[Dict[str, str]] = None
+    ) -> ClientConnection:
+        """
+        Return the client's shared WebSocket connection, opening it if needed
+        
+        The connection is reused across calls until it is closed, so repeated
+        use skips the TCP and WebSocket handshakes. Close it with close_websocket().
+        
+        Args:
+            headers: Optional headers, only used when a new connection is opened
+            
+        Returns:
+            WebSocket connection object
+        """
+        if self._ws_lock is None:
+            self._ws_lock = asyncio.Lock()
+        async with self._ws_lock:
+            if self._ws is None or self._ws.state is not State.OPEN:
+                self._ws = await self.connect_websocket(headers=headers)
+            return self._ws
+
+    async def close_websocket(self) -> None:
+        """Close the shared WebSocket connection opened by get_or_open_websocket"""
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
 
     def execute_code(
         self,
@@ -248,49 +718,312 @@ class CodeExecutionClient:
         Returns:
             ExecutionResult object containing execution results
         """
-        payload = {
-            "language": language,
-            "version": version,
-            "files": [{
-                "name": name,
-                "content": code,
-                "encoding": encoding
-            }]
-        }
-
-        if dependencies is not None:
-            payload["dependencies"] = dependencies
-        if args is not None:
-            payload["args"] = args
-        if stdin is not None:
-            payload["stdin"] = stdin
-        if compile_memory_limit is not None:
-            payload["compile_memory_limit"] = compile_memory_limit
-        if run_memory_limit is not None:
-            payload["run_memory_limit"] = run_memory_limit
-        if run_timeout is not None:
-            payload["run_timeout"] = run_timeout
-        if compile_timeout is not None:
-            payload["compile_timeout"] = compile_timeout
-        if run_cpu_time is not None:
-            payload["run_cpu_time"] = run_cpu_time
-        if compile_cpu_time is not None:
-            payload["compile_cpu_time"] = compile_cpu_time
-
-        response = self._make_request("POST", "/execute", json=payload, headers=headers)
-        
-        result = ExecutionResult()
-        
-        if "stages" in response:
-            stages = response["stages"]
-            if "install" in stages:
-                result.install_output = stages["install"].get("stdout")
-                result.install_error = stages["install"].get("stderr")
-            if "execute" in stages:
-                result.execute_output = stages["execute"].get("stdout")
-                result.execute_error = stages["execute"].get("stderr")
-        
-        if "webAppUrl" in response:
-            result.web_app_url = response["webAppUrl"]
+        payload = _build_execute_payload(
+            code, language, version, name, encoding,
+            dependencies=dependencies,
+            args=args,
+            stdin=stdin,
+            compile_memory_limit=compile_memory_limit,
+            run_memory_limit=run_memory_limit,
+            run_timeout=run_timeout,
+            compile_timeout=compile_timeout,
+            run_cpu_time=run_cpu_time,
+            compile_cpu_time=compile_cpu_time
+        )
+        response = self._make_request(
+            "POST", "/execute", json=payload, headers=_with_gzip(headers), stream=True
+        )
+        return _parse_execute_response(response)
+
+    def execute_code_batch(
+        self,
+        jobs: List[Dict[str, Any]],
+        headers: Optional[Dict[str, str]] = None
+    ) -> List[ExecutionResult]:
+        """
+        Execute several independent jobs with as few round trips as possible
+        
+        Jobs are posted in a single request to the /execute/batch endpoint. If
+        the server does not provide it, the jobs are executed concurrently over
+        the pooled session instead, and the batch endpoint is not probed again.
+        
+        Args:
+            jobs: List of keyword-argument dicts for execute_code, without
+                headers (headers apply to the whole batch)
+            headers: Optional headers for this request
+            
+        Returns:
+            List of ExecutionResult objects in the same order as jobs
+            
+        Raises:
+            TypeError: If a job sets headers
+        """
+        if any('headers' in job for job in jobs):
+            raise TypeError("Jobs can't set headers; pass headers to execute_code_batch")
+        if not jobs:
+            return []
+
+        if self._supports_batch is not False:
+            payload = {"batch": [_build_execute_payload(**job) for job in jobs]}
+            try:
+                response = self._make_request(
+                    "POST", "/execute/batch", json=payload, headers=_with_gzip(headers), stream=True
+                )
+            except PackageNotFoundError:
+                self._supports_batch = False
+            except CodeExecutionError as e:
+                if e.status_code != 405:
+                    raise
+                self._supports_batch = False
+            else:
+                self._supports_batch = True
+                return [_parse_execute_response(result) for result in response["results"]]
+
+        with ThreadPoolExecutor(max_workers=min(self.pool_size, len(jobs))) as executor:
+            return list(executor.map(lambda job: self.execute_code(headers=headers, **job), jobs))
+
+class AsyncCodeExecutionClient:
+    def __init__(
+        self,
+        base_url: str = "http://localhost/api/v2",
+        timeout: int = 30,
+        headers: Optional[Dict[str, str]] = None,
+        max_connections: int = 64,
+        http2: bool = True,
+        compress_requests: bool = False,
+        transport: Optional["httpx.AsyncBaseTransport"] = None
+    ):
+        """
+        Initialize the AsyncCodeExecutionClient
+        
+        Requires the optional httpx dependency (pip install "codux[async]").
+        
+        Args:
+            base_url: Base URL for the API
+            timeout: Request timeout in seconds
+            headers: Optional dictionary of default headers to include in all requests
+            max_connections: Maximum number of keep-alive connections
+            http2: Multiplex concurrent requests over a single HTTP/2 connection
+            compress_requests: Gzip JSON request bodies of 1 KiB or more and send them
+                with Content-Encoding: gzip (the server must accept compressed bodies)
+            transport: Optional httpx transport to send requests with, instead of the
+                default connection pool (max_connections and http2 are then ignored)
+        """
+        if httpx is None:
+            raise ImportError(
+                "AsyncCodeExecutionClient requires httpx. "
+                "Install it with: pip install \"codux[async]\""
+            )
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.compress_requests = compress_requests
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            headers={"Accept-Encoding": "identity", **(headers or {})},
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            transport=transport
+        )
+
+    async def __aenter__(self) -> "AsyncCodeExecutionClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connections"""
+        await self._client.aclose()
+
+    async def _make_request(
+        self,
+        method: str,
+        endpoint: str,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Make an HTTP request to the API
+        
+        Args:
+            method: HTTP method
+            endpoint: API endpoint
+            headers: Optional additional headers for this specific request
+            **kwargs: Additional arguments passed to httpx.AsyncClient.request()
+            
+        Returns:
+            Dict containing the JSON response
+            
+        Raises:
+            PackageNotFoundError: When a package is not found
+            PackageAlreadyInstalledError: When attempting to install an existing package
+            CodeExecutionError: For other API errors
+        """
+        if 'json' in kwargs:
+            kwargs['content'], body_headers = _json_body(kwargs.pop('json'), self.compress_requests)
+            headers = {**body_headers, **(headers or {})}
+
+        try:
+            response = await self._client.request(method, endpoint, headers=headers, **kwargs)
+        except httpx.HTTPError as e:
+            raise CodeExecutionError(f"API request failed: {str(e)}")
+
+        if response.status_code == 404:
+            raise PackageNotFoundError(_error_message(response, 'Package not found'))
+        elif response.status_code == 409 and endpoint == '/packages':
+            raise PackageAlreadyInstalledError(_error_message(response, 'Package already installed'))
+        elif response.is_error:
+            raise CodeExecutionError(
+                f"API request failed: {_error_message(response, f'HTTP {response.status_code}')}",
+                response.status_code
+            )
+
+        return _loads_body(response.content)
+
+    async def list_runtimes(self, headers: Optional[Dict[str, str]] = None) -> List[Runtime]:
+        """
+        List available runtimes
+        
+        Args:
+            headers: Optional headers for this request
+            
+        Returns:
+            List of Runtime objects
+        """
+        response = await self._make_request("GET", "/runtimes", headers=headers)
+        return [_from_dict(Runtime, runtime) for runtime in response]
+
+    async def list_packages(self, headers: Optional[Dict[str, str]] = None) -> List[Package]:
+        """
+        List installed packages
+        
+        Args:
+            headers: Optional headers for this request
+            
+        Returns:
+            List of Package objects
+        """
+        response = await self._make_request("GET", "/packages", headers=headers)
+        return [_from_dict(Package, package) for package in response]
+
+    async def get_package(
+        self,
+        language: str,
+        version: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Optional[Package]:
+        """
+        Look up a package by language and version
+        
+        Args:
+            language: Programming language
+            version: Language version
+            headers: Optional headers for this request
+            
+        Returns:
+            The matching Package, or None if the server doesn't list it
+        """
+        packages = await self.list_packages(headers=headers)
+        return _index_packages(packages).get((language, version))
+
+    async def install_package(
+        self,
+        language: str,
+        version: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> bool:
+        """
+        Install a package
+        
+        Args:
+            language: Programming language
+            version: Language version
+            headers: Optional headers for this request
+            
+        Returns:
+            True if package was installed, False if already installed
+        """
+        payload = {"language": language, "version": version}
+        try:
+            await self._make_request("POST", "/packages", json=payload, headers=headers)
+            return True
+        except PackageAlreadyInstalledError:
+            return False
+
+    async def uninstall_package(
+        self,
+        language: str,
+        version: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Uninstall a package
+        
+        Args:
+            language: Programming language
+            version: Language version
+            headers: Optional headers for this request
+        """
+        payload = {"language": language, "version": version}
+        await self._make_request("DELETE", "/packages", json=payload, headers=headers)
+
+    async def terminate_process(
+        self,
+        process_id: str,
+        headers: Optional[Dict[str, str]] = None
+    ) -> None:
+        """
+        Terminate a running process
+        
+        Args:
+            process_id: ID of the process to terminate
+            headers: Optional headers for this request
+        """
+        await self._make_request("DELETE", f"/process/{process_id}", headers=headers)
+
+    async def execute_code(
+        self,
+        code: str,
+        language: str,
+        version: str,
+        name: str = "main",
+        encoding: str = "utf8",
+        headers: Optional[Dict[str, str]] = None,
+        **options
+    ) -> ExecutionResult:
+        """
+        Execute code in the specified programming language
+        
+        Accepts the same execution options as CodeExecutionClient.execute_code.
+        
+        Args:
+            code: The source code to execute
+            language: Programming language
+            version: Language version
+            name: Name of the file (defaults to "main")
+            encoding: File encoding (defaults to "utf8")
+            headers: Optional headers for this request
+            **options: Optional execution limits, args, stdin and dependencies
+        
+        Returns:
+            ExecutionResult object containing execution results
+        """
+        payload = _build_execute_payload(code, language, version, name, encoding, **options)
+        response = await self._make_request("POST", "/execute", json=payload, headers=_with_gzip(headers))
+        return _parse_execute_response(response)
+
+    async def gather_execute(self, jobs: List[Dict[str, Any]]) -> List[ExecutionResult]:
+        """
+        Execute several independent jobs concurrently
+        
+        Args:
+            jobs: List of keyword-argument dicts for execute_code
             
-        return result
\ No newline at end of file
+        Returns:
+            List of ExecutionResult objects in the same order as jobs
+        """
+        return await asyncio.gather(*(self.execute_code(**job) for job in jobs))
@@ -1,89 +1,250 @@
 # src/latency_measure/main.py
 import os
+import math
 import time
-import statistics
 import json
-from typing import List, Dict
+import dataclasses
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+import requests
+from array import array
+from typing import Any, List, Dict, Optional, Tuple
 from codux import CodeExecutionClient, ExecutionResult
 
+try:
+    import orjson
+except ImportError:  # Optional dependency, installed with codux's "speedups" extra
+    orjson = None
+
+_NS_PER_MS = 1_000_000
+
+# Responses that mean the server wants us to slow down, and the bounds of
+# the adaptive backoff applied when one is seen. The client never retries
+# a POST /execute on these, so each one reaches the measurement loop with
+# its status code and no hidden retry time inside the sample.
+_THROTTLE_STATUSES = frozenset((429, 503))
+_MIN_BACKOFF = 0.1
+_MAX_BACKOFF = 10.0
+
+# Default API URL, read once at import
+_DEFAULT_BASE_URL = os.getenv('CODUX_API_URL', 'http://localhost/api/v2')
+
+# Custom headers come from CODUX_HEADER{1,2}_{NAME,VALUE}. They are read once
+# at import, and only fully defined name/value pairs are used.
+_HEADER_ENV = tuple(
+    (os.getenv(f'CODUX_HEADER{i}_NAME'), os.getenv(f'CODUX_HEADER{i}_VALUE'))
+    for i in (1, 2)
+)
+_HEADERS = {name: value for name, value in _HEADER_ENV if name and value}
+_HEADERS_CONFIG = {
+    'header1_name': _HEADER_ENV[0][0],
+    'header2_name': _HEADER_ENV[1][0],
+    'headers_used': bool(_HEADERS)
+}
+
+def _to_jsonable(obj: Any) -> Any:
+    """json.dumps fallback for ExecutionResult and other dataclasses"""
+    if dataclasses.is_dataclass(obj):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _percentile(sorted_ns: List[int], q: float) -> float:
+    """Linearly interpolated percentile (0 <= q <= 1) of an ascending list"""
+    position = (len(sorted_ns) - 1) * q
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_ns) - 1)
+    return sorted_ns[lower] + (sorted_ns[upper] - sorted_ns[lower]) * (position - lower)
+
+def _summarize(latencies_ns: List[int]) -> Dict[str, float]:
+    """
+    Compute latency statistics in milliseconds from integer nanosecond samples
+
+    A single sort yields min, max, median and percentiles; mean and sample
+    standard deviation are plain float sums rather than the exact (and much
+    slower) Fraction arithmetic of the statistics module.
+    """
+    ordered = sorted(latencies_ns)
+    n = len(ordered)
+    mean = sum(ordered) / n
+    stdev = math.sqrt(math.fsum((x - mean) ** 2 for x in ordered) / (n - 1)) if n > 1 else 0
+    return {
+        "min_ms": ordered[0] / _NS_PER_MS,
+        "max_ms": ordered[-1] / _NS_PER_MS,
+        "mean_ms": mean / _NS_PER_MS,
+        "median_ms": _percentile(ordered, 0.5) / _NS_PER_MS,
+        "stdev_ms": stdev / _NS_PER_MS,
+        "p90_ms": _percentile(ordered, 0.9) / _NS_PER_MS,
+        "p95_ms": _percentile(ordered, 0.95) / _NS_PER_MS,
+        "p99_ms": _percentile(ordered, 0.99) / _NS_PER_MS,
+        "num_samples": n
+    }
+
+def _sleep_until(deadline_ns: int) -> None:
+    """Sleep until time.perf_counter_ns() reaches deadline_ns, if it hasn't already"""
+    remaining_ns = deadline_ns - time.perf_counter_ns()
+    if remaining_ns > 0:
+        time.sleep(remaining_ns / 1e9)
+
 class LatencyMeasurement:
-    def __init__(self, base_url: str = None):
+    def __init__(
+        self,
+        base_url: str = None,
+        keep_bodies: bool = False,
+        session: Optional[requests.Session] = None,
+        executor: Optional[Executor] = None
+    ):
         """
         Initialize the LatencyMeasurement class
         Args:
-            base_url: Optional URL override. If not provided, uses CODUX_API_URL environment variable
+            base_url: Optional URL override. If not provided, uses the CODUX_API_URL environment
+                variable as read at import
+            keep_bodies: Keep each ExecutionResult in the results, not just its latency and outcome
+            session: Optional pre-configured requests.Session for the underlying client
+            executor: Optional executor for concurrent measurements, reused instead of
+                creating a thread pool per call (it is not shut down by this class)
         """
-        self.base_url = base_url or os.getenv('CODUX_API_URL', 'http://localhost/api/v2')
+        self.keep_bodies = keep_bodies
+        self.executor = executor
+        self.base_url = base_url or _DEFAULT_BASE_URL
+        self._session = session
+        self._client: Optional[CodeExecutionClient] = None
+        # Samples are stored as parallel arrays of packed scalars rather than a
+        # dict per sample; the results property rebuilds dicts on demand
+        self._timestamps_ns = array('q')
+        self._latencies_ns = array('q')
+        self._success = array('B')
+        self._errors: Dict[int, Tuple[str, Optional[int]]] = {}
+        self._bodies: Dict[int, ExecutionResult] = {}
+        self._results_lock = threading.Lock()
         
-        # Get headers from environment variables
-        header1_name = os.getenv('CODUX_HEADER1_NAME')
-        header1_value = os.getenv('CODUX_HEADER1_VALUE')
-        header2_name = os.getenv('CODUX_HEADER2_NAME')
-        header2_value = os.getenv('CODUX_HEADER2_VALUE')
+        # Store header config in results for debugging
+        self.headers_config = dict(_HEADERS_CONFIG)
+
+    def __enter__(self) -> "LatencyMeasurement":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def client(self) -> CodeExecutionClient:
+        """
+        The underlying client, built once on first use and reused for every sample
+        """
+        if self._client is None:
+            self._client = CodeExecutionClient(
+                base_url=self.base_url,
+                headers=_HEADERS,
+                session=self._session
+            )
+        return self._client
+
+    @client.setter
+    def client(self, client: CodeExecutionClient) -> None:
+        self._client = client
+
+    def close(self) -> None:
+        """
+        Close the underlying client's connections, if it was ever created
+        """
+        if self._client is not None:
+            self._client.close()
+
+    @property
+    def results(self) -> List[Dict]:
+        """
+        Recorded samples as a list of dicts, built on access
+        """
+        results = []
+        for i, latency_ns in enumerate(self._latencies_ns):
+            entry = {
+                "timestamp_ns": self._timestamps_ns[i],
+                "latency_ns": latency_ns,
+                "success": bool(self._success[i])
+            }
+            if i in self._errors:
+                entry["error"], entry["status_code"] = self._errors[i]
+            if i in self._bodies:
+                entry["result"] = self._bodies[i]
+            results.append(entry)
+        return results
+
+    def clear_results(self) -> None:
+        """
+        Discard all recorded samples
+        """
+        with self._results_lock:
+            self._timestamps_ns = array('q')
+            self._latencies_ns = array('q')
+            self._success = array('B')
+            self._errors = {}
+            self._bodies = {}
+
+    def _reserve(self, count: int) -> int:
+        """
+        Grow the sample arrays by count zeroed slots and return the first index
+        """
+        with self._results_lock:
+            start = len(self._latencies_ns)
+            self._timestamps_ns.extend(array('q', bytes(8 * count)))
+            self._latencies_ns.extend(array('q', bytes(8 * count)))
+            self._success.extend(bytes(count))
+        return start
+
+    def _execute_timed(
+        self,
+        code: str,
+        language: str,
+        version: str,
+        index: Optional[int] = None
+    ) -> Tuple[int, bool, Optional[int]]:
+        """
+        Execute code once and record the sample in slot index (a new slot if None)
+        Returns (latency in nanoseconds, success, HTTP status code of a failure)
+        """
+        result = None
+        error = None
+        status_code = None
+        client = self.client  # Resolved outside the timed region
+        start_ns = time.perf_counter_ns()
         
-        # Build headers dictionary, only including headers that are fully defined
-        headers = {}
-        if header1_name and header1_value:
-            headers[header1_name] = header1_value
-        if header2_name and header2_value:
-            headers[header2_name] = header2_value
-            
-        self.client = CodeExecutionClient(
-            base_url=self.base_url,
-            headers=headers
-        )
-        self.results: List[Dict] = []
+        try:
+            result = client.execute_code(
+                language=language,
+                version=version,
+                code=code
+            )
+            latency_ns = time.perf_counter_ns() - start_ns
+        except Exception as e:
+            latency_ns = time.perf_counter_ns() - start_ns
+            error = str(e)
+            status_code = getattr(e, "status_code", None)
         
-        # Store header config in results for debugging
-        self.headers_config = {
-            'header1_name': header1_name,
-            'header2_name': header2_name,
-            'headers_used': bool(headers)
-        }
+        if index is None:
+            index = self._reserve(1)
+        with self._results_lock:
+            self._timestamps_ns[index] = time.time_ns()
+            self._latencies_ns[index] = latency_ns
+            self._success[index] = error is None
+            if error is not None:
+                self._errors[index] = (error, status_code)
+            elif self.keep_bodies:
+                self._bodies[index] = result
+        return latency_ns, error is None, status_code
 
     def measure_single_execution(
         self, 
-        code: str = "console.log(Array(1000000).fill(0).map((x,i) => i*i).reduce((a,b) => a+b, 0))",
+        code: str = "console.log('test')",
         language: str = "javascript",
         version: str = "20.11.1"
     ) -> float:
         """
         Measure the latency of a single code execution
+        The default code is trivial so the sample reflects request overhead
+        rather than server-side compute; pass heavier code to measure that
         Returns the latency in milliseconds
         """
-        start_time = time.perf_counter()
-        
-        try:
-            result = self.client.execute_code(
-                language=language,
-                version=version,
-                code=code
-            )
-            end_time = time.perf_counter()
-            latency = (end_time - start_time) * 1000  # Convert to milliseconds
-            
-            execution_data = {
-                "timestamp": time.time(),
-                "latency_ms": latency,
-                "success": True,
-                "result": result,
-                "headers_config": self.headers_config
-            }
-            
-        except Exception as e:
-            end_time = time.perf_counter()
-            latency = (end_time - start_time) * 1000
-            
-            execution_data = {
-                "timestamp": time.time(),
-                "latency_ms": latency,
-                "success": False,
-                "error": str(e),
-                "headers_config": self.headers_config
-            }
-            
-        self.results.append(execution_data)
-        return latency
+        return self._execute_timed(code, language, version)[0] / _NS_PER_MS
 
     def measure_multiple_executions(
         self,
@@ -91,40 +252,119 @@ class LatencyMeasurement:
         code: str = "console.log('test')",
         language: str = "javascript",
         version: str = "20.11.1",
-        delay: float = 0.1
+        delay: float = 0.0,
+        concurrency: int = 1,
+        warmup: int = 1
     ) -> Dict:
         """
         Measure latency over multiple executions and return statistics
+        
+        Executions run back to back by default to keep the pooled connection
+        warm. With a delay, they start on a fixed schedule regardless of how
+        long each one takes. If the server throttles (429/503), an adaptive
+        backoff is added between executions, doubling on each throttled sample
+        and halving on each other one.
+        
+        With concurrency > 1, executions are dispatched to the executor given
+        at construction (or a thread pool created for this call) so up to that
+        many are in flight at once.
+        
+        The first `warmup` executions are not recorded, so connection setup
+        and other one-time costs don't skew the statistics.
+        
         Args:
             num_executions: Number of executions to perform
             code: Code to execute
             language: Programming language
             version: Language version
-            delay: Delay between executions in seconds
+            delay: Interval between the starts of consecutive executions in seconds
+            concurrency: Maximum number of executions in flight at once
+            warmup: Number of untracked executions to run before measuring
         """
-        latencies = []
+        for _ in range(warmup):
+            try:
+                self.client.execute_code(language=language, version=version, code=code)
+            except Exception:
+                pass  # Persistent failures show up in the measured samples
         
-        for _ in range(num_executions):
-            latency = self.measure_single_execution(code, language, version)
-            latencies.append(latency)
-            if delay > 0:
-                time.sleep(delay)
+        # Slots for every sample are allocated up front and filled by index,
+        # so concurrent samples land in dispatch order
+        start = self._reserve(num_executions)
+        
+        # Executions start on a fixed schedule (one every `delay` seconds), so a
+        # slow sample eats into the next gap instead of pushing every later one out
+        # The schedule is kept in integer nanoseconds so it doesn't drift from
+        # float rounding over long runs
+        period_ns = int(delay * 1e9)
+        deadline = time.perf_counter_ns()
+        
+        if concurrency > 1:
+            executor = self.executor or ThreadPoolExecutor(max_workers=min(concurrency, num_executions))
+            # Caps in-flight executions even when a shared executor has more workers
+            slots = threading.BoundedSemaphore(concurrency)
             
-        stats = {
-            "min_ms": min(latencies),
-            "max_ms": max(latencies),
-            "mean_ms": statistics.mean(latencies),
-            "median_ms": statistics.median(latencies),
-            "stdev_ms": statistics.stdev(latencies) if len(latencies) > 1 else 0,
-            "num_samples": len(latencies),
-            "success_rate": sum(r["success"] for r in self.results[-num_executions:]) / num_executions,
+            def run_one(index: int) -> Tuple[int, bool, Optional[int]]:
+                try:
+                    return self._execute_timed(code, language, version, index)
+                finally:
+                    slots.release()
+            
+            try:
+                futures = []
+                for i in range(num_executions):
+                    slots.acquire()
+                    futures.append(executor.submit(run_one, start + i))
+                    deadline += period_ns
+                    if i < num_executions - 1:
+                        _sleep_until(deadline)
+                for future in futures:
+                    future.result()
+            finally:
+                if executor is not self.executor:
+                    executor.shutdown()
+        else:
+            backoff = 0.0
+            for i in range(num_executions):
+                _, _, status_code = self._execute_timed(code, language, version, start + i)
+                if status_code in _THROTTLE_STATUSES:
+                    backoff = min(max(backoff * 2, _MIN_BACKOFF), _MAX_BACKOFF)
+                elif backoff:
+                    backoff = backoff / 2 if backoff > _MIN_BACKOFF else 0.0
+                deadline = max(deadline + period_ns, time.perf_counter_ns() + int(backoff * 1e9))
+                if i < num_executions - 1:
+                    _sleep_until(deadline)
+        
+        stop = start + num_executions
+        stats = _summarize(self._latencies_ns[start:stop])
+        stats.update({
+            # Counted over the raw bytes in C rather than summing int objects
+            "success_rate": self._success[start:stop].tobytes().count(1) / num_executions,
             "headers_config": self.headers_config
-        }
+        })
         
         return stats
 
+    def _detailed_entries(self) -> List[Dict]:
+        return [{**r, "latency_ms": r["latency_ns"] / _NS_PER_MS} for r in self.results]
+
     def get_detailed_results(self) -> str:
         """
         Return detailed results in a formatted string
         """
-        return json.dumps(self.results, indent=2)
\ No newline at end of file
+        entries = self._detailed_entries()
+        if orjson is not None:
+            return orjson.dumps(entries, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS).decode()
+        return json.dumps(entries, indent=2, default=_to_jsonable)
+
+    def save_results(self, path: str) -> None:
+        """
+        Write detailed results as JSON to path without building an intermediate string
+        """
+        entries = self._detailed_entries()
+        if orjson is not None:
+            with open(path, 'wb') as f:
+                f.write(orjson.dumps(entries, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_DATACLASS))
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            for chunk in json.JSONEncoder(indent=2, default=_to_jsonable).iterencode(entries):
+                f.write(chunk)
\ No newline at end of file
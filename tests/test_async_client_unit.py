@@ -0,0 +1,89 @@
+# tests/test_async_client_unit.py
+import asyncio
+import json
+import httpx
+import pytest
+from codux import (
+    AsyncCodeExecutionClient,
+    CodeExecutionError,
+    PackageAlreadyInstalledError,
+    PackageNotFoundError,
+)
+
+def mock_client(handler):
+    """AsyncCodeExecutionClient whose requests are answered by handler"""
+    return AsyncCodeExecutionClient(
+        base_url="http://fake/api/v2",
+        transport=httpx.MockTransport(handler)
+    )
+
+async def test_list_runtimes_joins_base_url():
+    """Test endpoints are resolved under the base URL path"""
+    seen = []
+    def handler(request):
+        seen.append(str(request.url))
+        return httpx.Response(200, json=[{"language": "python", "version": "3.9", "extra": 1}])
+    async with mock_client(handler) as client:
+        runtimes = await client.list_runtimes()
+    assert seen == ["http://fake/api/v2/runtimes"]
+    assert runtimes[0].language == "python"
+
+async def test_404_raises_package_not_found():
+    """Test a 404 maps to PackageNotFoundError with the API message"""
+    async with mock_client(lambda request: httpx.Response(404, json={"message": "no such package"})) as client:
+        with pytest.raises(PackageNotFoundError, match="no such package"):
+            await client.uninstall_package("python", "3.9")
+
+async def test_409_on_install_returns_false():
+    """Test a 409 from /packages means the package is already installed"""
+    async with mock_client(lambda request: httpx.Response(409, json={"message": "installed"})) as client:
+        assert await client.install_package("python", "3.9") is False
+        with pytest.raises(PackageAlreadyInstalledError):
+            await client._make_request("POST", "/packages", json={})
+
+async def test_error_status_raises_code_execution_error():
+    """Test other error statuses keep the API message and status code"""
+    async with mock_client(lambda request: httpx.Response(503, json={"message": "busy"})) as client:
+        with pytest.raises(CodeExecutionError) as excinfo:
+            await client.execute_code(code="print(1)", language="python", version="3.9")
+    assert str(excinfo.value) == "API request failed: busy"
+    assert excinfo.value.status_code == 503
+
+async def test_error_status_without_json_body():
+    """Test an error without a JSON body falls back to the status"""
+    async with mock_client(lambda request: httpx.Response(500, content=b"oops")) as client:
+        with pytest.raises(CodeExecutionError, match="HTTP 500"):
+            await client.list_packages()
+
+async def test_transport_error_raises_code_execution_error():
+    """Test connection failures are wrapped"""
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+    async with mock_client(handler) as client:
+        with pytest.raises(CodeExecutionError, match="refused"):
+            await client.list_runtimes()
+
+async def test_gather_execute_preserves_order():
+    """Test results come back in job order even when responses finish out of order"""
+    async def handler(request):
+        code = json.loads(request.content)["files"][0]["content"]
+        await asyncio.sleep(0.03 if code == "first" else 0)
+        return httpx.Response(200, json={"stages": {"execute": {"stdout": code, "stderr": ""}}})
+    async with mock_client(handler) as client:
+        results = await client.gather_execute([
+            {"code": "first", "language": "python", "version": "3.9"},
+            {"code": "second", "language": "python", "version": "3.9"},
+        ])
+    assert [r.execute_output for r in results] == ["first", "second"]
+
+def test_missing_httpx_raises_import_error(monkeypatch):
+    """Test a clear ImportError when the async extra isn't installed"""
+    monkeypatch.setattr('codux.main.httpx', None)
+    with pytest.raises(ImportError, match="codux\\[async\\]"):
+        AsyncCodeExecutionClient()
+
+async def test_non_json_success_raises_code_execution_error():
+    """Test a 2xx response with a non-JSON body is reported as an API failure"""
+    async with mock_client(lambda request: httpx.Response(200, content=b"<html></html>")) as client:
+        with pytest.raises(CodeExecutionError, match="invalid JSON response"):
+            await client.list_runtimes()
@@ -0,0 +1,449 @@
+# tests/test_client_unit.py
+import gzip
+import io
+import json
+import threading
+import types
+import pytest
+import requests
+import urllib3
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from websockets.asyncio.server import serve as serve_websocket
+from codux import CodeExecutionClient, CodeExecutionError, Runtime
+from codux.main import _ADAPTERS
+
+def make_response(status_code=200, payload=None, body=None, headers=None):
+    """Build a requests.Response whose raw body is readable like a live one"""
+    if body is None:
+        body = b"" if payload is None else json.dumps(payload).encode()
+    if isinstance(body, bytes):
+        headers = {"Content-Length": str(len(body)), **(headers or {})}
+        body = io.BytesIO(body)
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers.update(headers or {})
+    response.raw = urllib3.HTTPResponse(body=body, status=status_code, preload_content=False)
+    return response
+
+class FakeSession:
+    """Stand-in for requests.Session that records requests and replays responses
+
+    Responses are either replayed in order or built by handler(method, url, kwargs).
+    """
+    def __init__(self, *responses, handler=None):
+        self.headers = {}
+        self.requests = []
+        self.responses = list(responses)
+        self.handler = handler
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        with self._lock:
+            self.requests.append((method, url, kwargs))
+            if self.handler is not None:
+                return self.handler(method, url, kwargs)
+            return self.responses.pop(0)
+
+    def paths(self):
+        return [url.split("/api/v2", 1)[1] for _, url, _ in self.requests]
+
+def echo_execute(method, url, kwargs):
+    """Handler that answers /execute with the submitted code as stdout"""
+    code = json.loads(kwargs["data"])["files"][0]["content"]
+    return make_response(payload={"stages": {"execute": {"stdout": code}}})
+
+def echo_execute_gzip(method, url, kwargs):
+    """echo_execute for gzip-encoded request bodies"""
+    return echo_execute(method, url, {**kwargs, "data": gzip.decompress(kwargs["data"])})
+
+class TruncatedBody(io.RawIOBase):
+    """Body that yields some bytes and then fails like a dropped connection"""
+    def __init__(self, data):
+        self.data = data
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.data:
+            raise urllib3.exceptions.ProtocolError("Response ended prematurely")
+        n = min(len(buffer), len(self.data))
+        buffer[:n] = self.data[:n]
+        self.data = self.data[n:]
+        return n
+
+class BusyHandler(BaseHTTPRequestHandler):
+    """Answers every request with 503 and counts requests per method"""
+    counts = {}
+
+    def _busy(self):
+        self.counts[self.command] = self.counts.get(self.command, 0) + 1
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"message": "busy"}).encode()
+        self.send_response(503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _busy
+
+    def log_message(self, *args):
+        pass
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Answers every request with an empty execution result over keep-alive
+    connections, counting the connections opened"""
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def _ok(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"stages": {"execute": {"stdout": ""}}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = _ok
+
+    def log_message(self, *args):
+        pass
+
+def serve(handler):
+    """Run handler on a local server, yielding its API base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/api/v2"
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def busy_server():
+    """Local HTTP server that always responds 503"""
+    BusyHandler.counts = {}
+    yield from serve(BusyHandler)
+
+@pytest.fixture
+def keepalive_server():
+    """Local keep-alive HTTP server that counts connections"""
+    KeepAliveHandler.connections = 0
+    CodeExecutionClient.close_shared_pools()
+    yield from serve(KeepAliveHandler)
+    CodeExecutionClient.close_shared_pools()
+
+def execute(client):
+    """Run a trivial execution"""
+    return client.execute_code(code="print(1)", language="python", version="3.9")
+
+def test_short_lived_clients_reuse_shared_connection(keepalive_server):
+    """Test closing a client leaves the shared pool's connection warm"""
+    for _ in range(5):
+        with CodeExecutionClient(base_url=keepalive_server) as client:
+            execute(client)
+    assert KeepAliveHandler.connections == 1
+
+def test_execute_is_not_retried_on_503(busy_server):
+    """Test a POST is sent once and the API's error message is kept"""
+    with CodeExecutionClient(base_url=busy_server, max_retries=2) as client:
+        with pytest.raises(CodeExecutionError) as excinfo:
+            client.execute_code(code="print(1)", language="python", version="3.9")
+    assert str(excinfo.value) == "API request failed: busy"
+    assert excinfo.value.status_code == 503
+    assert BusyHandler.counts == {"POST": 1}
+
+def test_get_is_retried_then_mapped(busy_server):
+    """Test a GET is retried and the last response is mapped to an error"""
+    with CodeExecutionClient(base_url=busy_server, max_retries=2, stream_threshold=None) as client:
+        with pytest.raises(CodeExecutionError) as excinfo:
+            client.list_runtimes()
+    assert str(excinfo.value) == "API request failed: busy"
+    assert excinfo.value.status_code == 503
+    assert BusyHandler.counts == {"GET": 3}
+
+def test_stream_list_wraps_dropped_connection():
+    """Test a body cut off mid-array raises CodeExecutionError"""
+    session = FakeSession(make_response(body=TruncatedBody(b'[{"language": "python", ')))
+    client = CodeExecutionClient(base_url="http://fake/api/v2", session=session, stream_threshold=0)
+    with pytest.raises(CodeExecutionError, match="Response ended prematurely"):
+        client.list_runtimes()
+
+def test_stream_list_wraps_incomplete_json():
+    """Test a truncated JSON body raises CodeExecutionError"""
+    session = FakeSession(make_response(body=b'[{"language": "python", "ver'))
+    client = CodeExecutionClient(base_url="http://fake/api/v2", session=session, stream_threshold=0)
+    with pytest.raises(CodeExecutionError, match="API request failed"):
+        client.list_runtimes()
+
+JOBS = [
+    {"code": "first", "language": "python", "version": "3.9"},
+    {"code": "second", "language": "python", "version": "3.9"},
+]
+
+def test_batch_endpoint_used_when_supported():
+    """Test jobs go out in one request when /execute/batch exists"""
+    session = FakeSession(make_response(payload={"results": [
+        {"stages": {"execute": {"stdout": "first"}}},
+        {"stages": {"execute": {"stdout": "second"}}},
+    ]}))
+    client = CodeExecutionClient(base_url="http://fake/api/v2", session=session)
+    results = client.execute_code_batch(JOBS)
+    assert [r.execute_output for r in results] == ["first", "second"]
+    assert session.paths() == ["/execute/batch"]
+    assert len(json.loads(session.requests[0][2]["data"])["batch"]) == 2
+    assert client._supports_batch is True
+
+@pytest.mark.parametrize("status_code", [404, 405])
+def test_batch_falls_back_and_remembers(status_code):
+    """Test a missing batch endpoint falls back to single executions, probed once"""
+    def handler(method, url, kwargs):
+        if url.endswith("/execute/batch"):
+            return make_response(status_code, payload={"message": "nope"})
+        return echo_execute(method, url, kwargs)
+    session = FakeSession(handler=handler)
+    client = CodeExecutionClient(base_url="http://fake/api/v2", session=session)
+    for _ in range(2):
+        results = client.execute_code_batch(JOBS, headers={"X-Trace": "1"})
+        assert [r.execute_output for r in results] == ["first", "second"]
+    assert session.paths().count("/execute/batch") == 1
+    assert session.paths().count("/execute") == 4
+    assert all(kwargs["headers"]["X-Trace"] == "1" for _, _, kwargs in session.requests)
+    assert client._supports_batch is False
+
+def test_batch_other_errors_propagate():
+    """Test server errors from the batch endpoint are not mistaken for no support"""
+    session = FakeSession(make_response(500, payload={"message": "boom"}))
+    client = CodeExecutionClient(base_url="http://fake/api/v2", session=session)
+    with pytest.raises(CodeExecutionError, match="boom"):
+        client.execute_code_batch(JOBS)
+    assert client._supports_batch is None
+
+def test_batch_rejects_per_job_headers():
+    """Test jobs can't carry their own headers"""
+    session = FakeSession()
+    client = CodeExecutionClient(base_url="http://fake/api/v2", session=session)
+    with pytest.raises(TypeError, match="headers"):
+        client.execute_code_batch([{**JOBS[0], "headers": {"X-Trace": "1"}}])
+    assert session.requests == []
+
+RUNTIMES = [{"language": "python", "version": "3.9", "aliases": ["py"]}]
+PACKAGES = [{"language": "python", "language_version": "3.9", "installed": True}]
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable time.monotonic for the client's caches"""
+    now = [1000.0]
+    monkeypatch.setattr('codux.main.time', types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+def listing_client(cache_ttl=60.0):
+    """Client whose session answers listings and accepts package changes"""
+    def handler(method, url, kwargs):
+        if method == "GET":
+            return make_response(payload=RUNTIMES if url.endswith("/runtimes") else PACKAGES)
+        return make_response(payload={})
+    session = FakeSession(handler=handler)
+    return CodeExecutionClient(base_url="http://fake/api/v2", session=session, cache_ttl=cache_ttl), session
+
+def test_listings_are_cached_until_ttl_expires(clock):
+    """Test repeated listings within the TTL reuse the first response"""
+    client, session = listing_client(cache_ttl=60.0)
+    for _ in range(3):
+        assert client.list_runtimes()[0].language == "python"
+        assert client.list_packages()[0].installed is True
+    assert session.paths() == ["/runtimes", "/packages"]
+    clock[0] += 61
+    client.list_runtimes()
+    client.list_packages()
+    assert session.paths() == ["/runtimes", "/packages"] * 2
+
+def test_cached_listing_is_a_copy(clock):
+    """Test mutating a returned list doesn't change the cache"""
+    client, _ = listing_client()
+    client.list_runtimes().clear()
+    assert len(client.list_runtimes()) == 1
+
+def test_zero_ttl_disables_cache(clock):
+    """Test cache_ttl=0 fetches every time"""
+    client, session = listing_client(cache_ttl=0)
+    client.list_runtimes()
+    client.list_runtimes()
+    assert session.paths() == ["/runtimes"] * 2
+
+def test_custom_headers_bypass_cache(clock):
+    """Test listings with per-request headers neither read nor fill the cache"""
+    client, session = listing_client()
+    client.list_packages(headers={"X-Trace": "1"})
+    client.list_packages(headers={"X-Trace": "1"})
+    client.list_packages()
+    client.list_packages()
+    assert session.paths() == ["/packages"] * 3
+
+@pytest.mark.parametrize("change", ["install_package", "uninstall_package"])
+def test_package_changes_invalidate_caches(clock, change):
+    """Test installing or uninstalling drops both cached listings"""
+    client, session = listing_client()
+    client.list_runtimes()
+    client.list_packages()
+    getattr(client, change)("python", "3.9")
+    client.list_runtimes()
+    client.list_packages()
+    assert session.paths().count("/runtimes") == 2
+    assert session.paths().count("/packages") == 3
+
+def test_failed_install_still_invalidates_caches(clock):
+    """Test caches are dropped even when the install request fails"""
+    responses = [make_response(payload=PACKAGES), make_response(500, payload={"message": "boom"}),
+                 make_response(payload=PACKAGES)]
+    session = FakeSession(*responses)
+    client = CodeExecutionClient(base_url="http://fake/api/v2", session=session)
+    client.list_packages()
+    with pytest.raises(CodeExecutionError):
+        client.install_package("python", "3.9")
+    client.list_packages()
+    assert session.paths() == ["/packages"] * 3
+
+def test_get_package_uses_cached_index(clock):
+    """Test lookups share one package listing and miss cleanly"""
+    client, session = listing_client()
+    assert client.get_package("python", "3.9").installed is True
+    assert client.get_package("python", "2.7") is None
+    assert client.list_packages()[0].language == "python"
+    assert session.paths() == ["/packages"]
+    client.install_package("python", "2.7")
+    client.get_package("python", "3.9")
+    assert session.paths().count("/packages") == 3
+
+def test_get_package_with_headers_bypasses_cache(clock):
+    """Test lookups with per-request headers always fetch"""
+    client, session = listing_client()
+    client.get_package("python", "3.9")
+    assert client.get_package("python", "3.9", headers={"X-Trace": "1"}).installed is True
+    assert session.paths() == ["/packages"] * 2
+
+@pytest.fixture
+def fresh_pools():
+    """Start and end with an empty shared adapter registry"""
+    CodeExecutionClient.close_shared_pools()
+    yield
+    CodeExecutionClient.close_shared_pools()
+
+def test_clients_share_adapter_per_host(fresh_pools):
+    """Test clients for the same host and pool settings share one adapter"""
+    a = CodeExecutionClient(base_url="http://host-a/api/v2")
+    b = CodeExecutionClient(base_url="http://host-a/other")
+    c = CodeExecutionClient(base_url="http://host-b/api/v2")
+    d = CodeExecutionClient(base_url="http://host-a/api/v2", pool_size=4)
+    adapter = a.session.get_adapter("http://host-a/api/v2/runtimes")
+    assert b.session.get_adapter("http://host-a/other/runtimes") is adapter
+    assert c.session.get_adapter("http://host-b/api/v2/runtimes") is not adapter
+    assert d.session.get_adapter("http://host-a/api/v2/runtimes") is not adapter
+    assert len(_ADAPTERS) == 3
+
+def test_client_close_keeps_shared_pool(keepalive_server):
+    """Test closing one client leaves the shared pool's connection to the others"""
+    first = CodeExecutionClient(base_url=keepalive_server)
+    second = CodeExecutionClient(base_url=keepalive_server)
+    execute(first)
+    first.close()
+    execute(second)
+    assert KeepAliveHandler.connections == 1
+
+def test_close_shared_pools_resets_registry(fresh_pools):
+    """Test close_shared_pools empties the registry so new clients get fresh adapters"""
+    client = CodeExecutionClient(base_url="http://host-a/api/v2")
+    adapter = client.session.get_adapter("http://host-a/api/v2/runtimes")
+    CodeExecutionClient.close_shared_pools()
+    assert not _ADAPTERS
+    fresh = CodeExecutionClient(base_url="http://host-a/api/v2")
+    assert fresh.session.get_adapter("http://host-a/api/v2/runtimes") is not adapter
+
+def test_supplied_session_skips_registry(fresh_pools):
+    """Test a caller-supplied session is used as is"""
+    session = FakeSession()
+    client = CodeExecutionClient(base_url="http://host-a/api/v2", session=session)
+    assert client.session is session
+    assert not _ADAPTERS
+
+def test_compress_requests_gzips_large_bodies():
+    """Test large JSON bodies are sent gzipped and decode to the payload"""
+    session = FakeSession(handler=echo_execute_gzip)
+    client = CodeExecutionClient(base_url="http://fake/api/v2", session=session, compress_requests=True)
+    code = "print('x')\n" * 200
+    assert client.execute_code(code=code, language="python", version="3.9").execute_output == code
+    headers = session.requests[0][2]["headers"]
+    assert headers["Content-Encoding"] == "gzip"
+    assert headers["Content-Type"] == "application/json"
+
+def test_compress_requests_leaves_small_bodies():
+    """Test bodies under 1 KiB are sent uncompressed"""
+    session = FakeSession(handler=echo_execute)
+    client = CodeExecutionClient(base_url="http://fake/api/v2", session=session, compress_requests=True)
+    assert client.execute_code(code="print(1)", language="python", version="3.9").execute_output == "print(1)"
+    assert "Content-Encoding" not in session.requests[0][2]["headers"]
+
+def test_runtimes_are_hashable(clock):
+    """Test listed runtimes store aliases as a tuple and can be hashed"""
+    client, _ = listing_client()
+    runtime = client.list_runtimes()[0]
+    assert runtime.aliases == ("py",)
+    assert runtime in {Runtime(language="python", version="3.9", aliases=["py"])}
+
+HTML = b"<html><body>Bad gateway</body></html>"
+
+@pytest.mark.parametrize("call, stream_threshold", [
+    (lambda client: client.execute_code(code="print(1)", language="python", version="3.9"), None),
+    (lambda client: client.list_runtimes(), None),
+    (lambda client: client.list_runtimes(), 1024 * 1024),
+])
+def test_non_json_success_raises_code_execution_error(call, stream_threshold):
+    """Test a 2xx response with a non-JSON body is reported as an API failure"""
+    session = FakeSession(make_response(body=HTML))
+    client = CodeExecutionClient(
+        base_url="http://fake/api/v2", session=session, stream_threshold=stream_threshold
+    )
+    with pytest.raises(CodeExecutionError, match="invalid JSON response"):
+        call(client)
+
+@pytest.fixture
+async def websocket_server():
+    """Local WebSocket echo server recording each handshake's headers"""
+    handshakes = []
+    async def echo(connection):
+        handshakes.append(connection.request)
+        async for message in connection:
+            await connection.send(message)
+    async with serve_websocket(echo, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        yield f"http://127.0.0.1:{port}/api/v2", handshakes
+
+async def test_connect_websocket_sends_headers(websocket_server):
+    """Test connect_websocket opens /connect with the given headers"""
+    base_url, handshakes = websocket_server
+    client = CodeExecutionClient(base_url=base_url)
+    ws = await client.connect_websocket(headers={"X-Trace": "1"})
+    await ws.send("hello")
+    assert await ws.recv() == "hello"
+    await ws.close()
+    assert handshakes[0].path == "/api/v2/connect"
+    assert handshakes[0].headers["X-Trace"] == "1"
+
+async def test_get_or_open_websocket_reuses_until_closed(websocket_server):
+    """Test the shared WebSocket is reused while open and reopened after closing"""
+    base_url, handshakes = websocket_server
+    client = CodeExecutionClient(base_url=base_url)
+    ws = await client.get_or_open_websocket()
+    assert await client.get_or_open_websocket() is ws
+    await ws.close()
+    reopened = await client.get_or_open_websocket()
+    assert reopened is not ws
+    await reopened.send("again")
+    assert await reopened.recv() == "again"
+    await client.close_websocket()
+    assert len(handshakes) == 2
@@ -1,53 +1,53 @@
-# tests/test_latency_benchmarks.py
+# tests/test_latency.py
 import pytest
 from latency_measure import LatencyMeasurement
 
-@pytest.fixture
+# Printed as one write per test instead of a print per line
+REPORT_TMPL = (
+    "\n{name} stats:\n"
+    "Mean: {mean_ms:.2f}ms\n"
+    "Median: {median_ms:.2f}ms\n"
+    "Min: {min_ms:.2f}ms\n"
+    "Max: {max_ms:.2f}ms\n"
+    "StdDev: {stdev_ms:.2f}ms\n"
+    "P99: {p99_ms:.2f}ms"
+)
+
+@pytest.fixture(scope="module")
 def latency():
-    """Fixture for LatencyMeasurement instance"""
-    return LatencyMeasurement()
+    """Fixture for LatencyMeasurement instance, shared so tests reuse one client"""
+    with LatencyMeasurement() as measurement:
+        yield measurement
 
 def test_simple_log(latency):
     """Test simple console.log latency"""
+    latency.clear_results()
     stats = latency.measure_multiple_executions(
         num_executions=5,
         code="console.log('test')",
         delay=0.5
     )
-    print(f"\nSimple log stats:")
-    print(f"Mean: {stats['mean_ms']:.2f}ms")
-    print(f"Median: {stats['median_ms']:.2f}ms")
-    print(f"Min: {stats['min_ms']:.2f}ms")
-    print(f"Max: {stats['max_ms']:.2f}ms")
-    print(f"StdDev: {stats['stdev_ms']:.2f}ms")
+    print(REPORT_TMPL.format(name="Simple log", **stats))
     assert stats['success_rate'] > 0
 
 def test_cpu_intensive(latency):
     """Test CPU-intensive calculation latency"""
+    latency.clear_results()
     stats = latency.measure_multiple_executions(
         num_executions=3,
         code="console.log(Array(1000000).fill(0).map((x,i) => i*i).reduce((a,b) => a+b, 0))",
         delay=0.5
     )
-    print(f"\nCPU-intensive stats:")
-    print(f"Mean: {stats['mean_ms']:.2f}ms")
-    print(f"Median: {stats['median_ms']:.2f}ms")
-    print(f"Min: {stats['min_ms']:.2f}ms")
-    print(f"Max: {stats['max_ms']:.2f}ms")
-    print(f"StdDev: {stats['stdev_ms']:.2f}ms")
+    print(REPORT_TMPL.format(name="CPU-intensive", **stats))
     assert stats['success_rate'] > 0
 
 def test_memory_intensive(latency):
     """Test memory-intensive operation latency"""
+    latency.clear_results()
     stats = latency.measure_multiple_executions(
         num_executions=3,
-        code="const arr = Array(10000000).fill(0); console.log(arr.length)",
+        code="const arr = new Uint8Array(10_000_000); console.log(arr.length);",
         delay=0.5
     )
-    print(f"\nMemory-intensive stats:")
-    print(f"Mean: {stats['mean_ms']:.2f}ms")
-    print(f"Median: {stats['median_ms']:.2f}ms")
-    print(f"Min: {stats['min_ms']:.2f}ms")
-    print(f"Max: {stats['max_ms']:.2f}ms")
-    print(f"StdDev: {stats['stdev_ms']:.2f}ms")
+    print(REPORT_TMPL.format(name="Memory-intensive", **stats))
     assert stats['success_rate'] > 0
\ No newline at end of file
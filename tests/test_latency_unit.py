@@ -0,0 +1,153 @@
+# tests/test_latency_unit.py
+import importlib
+import json
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from codux import CodeExecutionError, ExecutionResult
+import latency_measure.main
+from latency_measure import LatencyMeasurement
+
+class FakeClient:
+    """Stand-in for CodeExecutionClient that never touches the network"""
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.calls = 0
+        self.error = None
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def execute_code(self, **kwargs):
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return ExecutionResult(execute_output="test\n")
+
+@pytest.fixture
+def fast_measurement(monkeypatch):
+    """LatencyMeasurement backed by a FakeClient"""
+    monkeypatch.setattr('latency_measure.main.CodeExecutionClient', FakeClient)
+    return LatencyMeasurement(base_url="http://fake/api/v2")
+
+@pytest.fixture
+def reload_main(monkeypatch):
+    """Reload latency_measure.main so its import-time environment is read again"""
+    def reload():
+        module = importlib.reload(latency_measure.main)
+        monkeypatch.setattr(module, 'CodeExecutionClient', FakeClient)
+        return module
+    yield reload
+    monkeypatch.undo()
+    importlib.reload(latency_measure.main)
+
+@pytest.fixture(scope="session")
+def shared_executor():
+    """Thread pool shared by all concurrent measurement tests"""
+    executor = ThreadPoolExecutor(max_workers=8)
+    yield executor
+    executor.shutdown()
+
+def test_initialization_with_override_url(fast_measurement):
+    """Test that an explicit base_url wins"""
+    assert fast_measurement.base_url == "http://fake/api/v2"
+    assert fast_measurement.client.kwargs["base_url"] == "http://fake/api/v2"
+
+def test_initialization_with_env_url(monkeypatch, reload_main):
+    """Test that CODUX_API_URL is used when no base_url is given"""
+    monkeypatch.setenv('CODUX_API_URL', "http://env/api/v2")
+    assert reload_main().LatencyMeasurement().base_url == "http://env/api/v2"
+
+def test_initialization_default(monkeypatch, reload_main):
+    """Test the default URL when nothing is configured"""
+    monkeypatch.delenv('CODUX_API_URL', raising=False)
+    assert reload_main().LatencyMeasurement().base_url == "http://localhost/api/v2"
+
+def test_measure_single_execution_success(fast_measurement):
+    """Test a successful execution is timed and recorded"""
+    latency = fast_measurement.measure_single_execution()
+    assert latency > 0
+    assert len(fast_measurement.results) == 1
+    assert fast_measurement.results[0]["success"] is True
+    assert "result" not in fast_measurement.results[0]
+
+def test_measure_single_execution_failure(fast_measurement):
+    """Test a failed execution is recorded with its error"""
+    fast_measurement.client.error = CodeExecutionError("API request failed: boom", 500)
+    fast_measurement.measure_single_execution()
+    result = fast_measurement.results[0]
+    assert result["success"] is False
+    assert result["error"] == "API request failed: boom"
+    assert result["status_code"] == 500
+
+def test_measure_multiple_executions(fast_measurement):
+    """Test statistics over several executions"""
+    stats = fast_measurement.measure_multiple_executions(num_executions=3, warmup=0)
+    assert stats["num_samples"] == 3
+    assert stats["success_rate"] == 1.0
+    assert stats["min_ms"] <= stats["median_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+    assert len(fast_measurement.results) == 3
+    assert fast_measurement.client.calls == 3
+
+def test_measure_multiple_executions_warmup(fast_measurement):
+    """Test warm-up executions run but are not recorded"""
+    stats = fast_measurement.measure_multiple_executions(num_executions=3, warmup=2)
+    assert stats["num_samples"] == 3
+    assert len(fast_measurement.results) == 3
+    assert fast_measurement.client.calls == 5
+
+def test_measure_multiple_executions_concurrent(fast_measurement):
+    """Test the thread pool path records every sample"""
+    stats = fast_measurement.measure_multiple_executions(num_executions=8, concurrency=4)
+    assert stats["num_samples"] == 8
+    assert len(fast_measurement.results) == 8
+
+def test_measure_multiple_executions_shared_executor(fast_measurement, shared_executor):
+    """Test a shared executor is used and left running"""
+    fast_measurement.executor = shared_executor
+    stats = fast_measurement.measure_multiple_executions(num_executions=8, concurrency=2)
+    assert stats["num_samples"] == 8
+    assert shared_executor.submit(lambda: 1).result() == 1
+
+@pytest.mark.parametrize("status_code, backoff", [(503, True), (429, True), (500, False)])
+def test_throttled_executions_back_off(monkeypatch, fast_measurement, status_code, backoff):
+    """Test 429/503 failures space out later executions and other errors don't"""
+    waits = []
+    monkeypatch.setattr(
+        'latency_measure.main._sleep_until',
+        lambda deadline_ns: waits.append(deadline_ns - time.perf_counter_ns())
+    )
+    fast_measurement.client.error = CodeExecutionError("API request failed: busy", status_code)
+    stats = fast_measurement.measure_multiple_executions(num_executions=3, warmup=0)
+    assert stats["success_rate"] == 0
+    assert len(waits) == 2
+    if backoff:
+        assert waits[0] > 0.09e9
+        assert waits[1] > 0.19e9
+    else:
+        assert all(wait <= 0 for wait in waits)
+
+def test_get_detailed_results(monkeypatch):
+    """Test detailed results are valid JSON including kept bodies"""
+    monkeypatch.setattr('latency_measure.main.CodeExecutionClient', FakeClient)
+    measurement = LatencyMeasurement(base_url="http://fake/api/v2", keep_bodies=True)
+    measurement.measure_single_execution()
+    detailed = json.loads(measurement.get_detailed_results())
+    assert detailed[0]["result"]["execute_output"] == "test\n"
+    assert detailed[0]["latency_ms"] == detailed[0]["latency_ns"] / 1_000_000
+
+def test_client_can_be_replaced(fast_measurement):
+    """Test assigning a client swaps the one used for measurements"""
+    replacement = FakeClient()
+    fast_measurement.client = replacement
+    fast_measurement.measure_single_execution()
+    assert replacement.calls == 1
+    fast_measurement.close()
+    assert replacement.closed
+
+def test_context_manager_closes_client(fast_measurement):
+    """Test leaving the with block closes the client"""
+    with fast_measurement as measurement:
+        measurement.measure_single_execution()
+    assert fast_measurement.client.closed
\ No newline at end of file